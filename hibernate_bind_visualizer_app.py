@@ -1,18 +1,20 @@
 """Streamlit-based Hibernate Bind Visualizer.
 
 This app parses Hibernate TRACE logs and binds parameters into the
-corresponding SQL query.  The parsing logic is largely unchanged from the
-previous Flask implementation, but the UI has been redesigned with Streamlit
-to provide a modern, responsive dashboard with light/dark theming.
+corresponding SQL query.  The parsing logic was carried over from the previous
+Flask implementation and has since been reworked; the UI has been redesigned
+with Streamlit to provide a modern, responsive dashboard with light/dark
+theming.
 """
 
 from __future__ import annotations
 
 import json
 import re
-from typing import List, Tuple
+from dataclasses import dataclass
+from itertools import chain
+from typing import Callable, List, Tuple
 
-import pandas as pd
 import streamlit as st
 import streamlit.components.v1 as components
 
@@ -75,100 +77,239 @@ EXAMPLE_LOGS = """{"message":"binding parameter [1] as [BOOLEAN] - [true]"}
 
 
 # ---------------------------------------------------------------------------
-# Parsing and binding logic (unchanged)
+# Parsing and binding logic
 # ---------------------------------------------------------------------------
 
-STRING_TYPES = {"VARCHAR", "CHAR", "LONGVARCHAR"}
-NUMERIC_TYPES = {"INTEGER", "BIGINT", "DECIMAL", "DOUBLE"}
-BOOLEAN_TYPES = {"BOOLEAN"}
-DATE_TYPES = {"DATE", "TIMESTAMP"}
-
-
-class Parameter(dict):
+STRING_TYPES = frozenset({"VARCHAR", "CHAR", "LONGVARCHAR"})
+NUMERIC_TYPES = frozenset({"INTEGER", "BIGINT", "DECIMAL", "DOUBLE"})
+BOOLEAN_TYPES = frozenset({"BOOLEAN"})
+DATE_TYPES = frozenset({"DATE", "TIMESTAMP"})
+
+# Canonical (upper-case) name for each known type as Hibernate may log it, so
+# the common case reuses one shared string instead of calling ``upper()``.
+_TYPE_NAMES = {
+    name: t
+    for t in STRING_TYPES | NUMERIC_TYPES | BOOLEAN_TYPES | DATE_TYPES
+    for name in (t, t.lower())
+}
+
+_BIND_RE = re.compile(
+    r"binding parameter \[(\d+)\] as \[(\w+)\] - \[([^\]\n]*)\]", re.ASCII
+)
+
+# Spellings Hibernate actually logs, checked before falling back to lower().
+_NULL_LITERALS = frozenset({"null", "NULL", "Null"})
+_BOOL_LITERALS = {
+    **dict.fromkeys(("true", "TRUE", "True", "1"), "1"),
+    **dict.fromkeys(("false", "FALSE", "False", "0"), "0"),
+}
+
+
+@dataclass(slots=True)
+class Parameter:
     """Container for a bound parameter."""
 
     index: int
     type: str
     original: str
-    normalized: str
-    error: str | None
+    normalized: str = ""
+    error: str | None = None
 
 
 def parse_logs(text: str) -> Tuple[List[Parameter], List[str]]:
-    pattern = re.compile(r"binding parameter \[(\d+)\] as \[(\w+)\] - \[(.*?)\]")
-    params: dict[int, Parameter] = {}
     warnings: List[str] = []
-    for match in pattern.finditer(text):
-        idx, typ, value = match.groups()
+    matches = _BIND_RE.findall(text)
+    # Well-formed logs bind 1..N, so each parameter drops straight into its
+    # slot and no sort is needed.  Indexes beyond the match count can never
+    # be contiguous and are kept aside rather than growing the slot list.
+    slots: List[Parameter | None] = [None] * len(matches)
+    overflow: dict[int, Parameter] = {}
+    for idx, typ, value in matches:
         idx_int = int(idx)
-        typ_upper = typ.upper()
-        if idx_int in params:
+        in_slots = 1 <= idx_int <= len(slots)
+        taken = slots[idx_int - 1] if in_slots else overflow.get(idx_int)
+        if taken is not None:
             warnings.append(
                 f"Duplicate parameter index {idx_int}; ignoring subsequent value."
             )
             continue
-        params[idx_int] = Parameter(
-            index=idx_int, type=typ_upper, original=value, normalized="", error=None
-        )
-    ordered_indexes = sorted(params.keys())
-    if ordered_indexes and ordered_indexes != list(range(1, len(ordered_indexes) + 1)):
+        typ = _TYPE_NAMES.get(typ) or typ.upper()
+        param = Parameter(index=idx_int, type=typ, original=value)
+        if in_slots:
+            slots[idx_int - 1] = param
+        else:
+            overflow[idx_int] = param
+    params = [p for p in slots if p is not None]
+    if overflow or any(p is None for p in slots[: len(params)]):
         warnings.append("Parameter indexes are not contiguous starting at 1.")
-    ordered_params = [params[i] for i in ordered_indexes]
-    return ordered_params, warnings
+        params.extend(overflow.values())
+        params.sort(key=lambda p: p.index)
+    return params, warnings
+
+
+def _is_numeric(s: str) -> bool:
+    """Match an optionally signed integer or decimal without the regex engine."""
+
+    whole, dot, frac = s.removeprefix("-").partition(".")
+    return whole.isdecimal() and (not dot or frac.isdecimal())
+
+
+def _quote(val: str) -> str:
+    if "'" in val:
+        val = val.replace("'", "''")
+    return "'" + val + "'"
+
+
+# Each normalizer returns ``(normalized, error)`` for a non-NULL value.
+NormResult = tuple[str, str | None]
+Normalizer = Callable[[Parameter, List[str], bool], NormResult]
+
+
+def _norm_bool(param: Parameter, diagnostics: List[str], expand_in: bool) -> NormResult:
+    val = param.original
+    norm = _BOOL_LITERALS.get(val) or _BOOL_LITERALS.get(val.lower())
+    if norm is None:
+        return "", f"Invalid boolean value '{val}'"
+    return norm, None
+
+
+def _norm_str(param: Parameter, diagnostics: List[str], expand_in: bool) -> NormResult:
+    val = param.original
+    if expand_in and "," in val:
+        # Escaping never touches commas or whitespace, so escape the whole
+        # value once and let a single join add the quotes around each item.
+        if "'" in val:
+            val = val.replace("'", "''")
+        items = [p.strip() for p in val.split(",")]
+        diagnostics.append(f"Expanded parameter {param.index} into IN list.")
+        return "('" + "','".join(items) + "')", None
+    return _quote(val), None
+
+
+def _norm_num(param: Parameter, diagnostics: List[str], expand_in: bool) -> NormResult:
+    val = param.original
+    stripped = val.strip()
+    if _is_numeric(stripped):
+        return stripped, None
+    return "", f"Non-numeric value '{val}' for {param.type}"
+
+
+def _norm_date(param: Parameter, diagnostics: List[str], expand_in: bool) -> NormResult:
+    return "'" + param.original + "'", None
+
+
+def _norm_raw(param: Parameter, diagnostics: List[str], expand_in: bool) -> NormResult:
+    diagnostics.append(f"Unknown JDBC type {param.type}; inserted raw value.")
+    return param.original, None
+
+
+_NORMALIZERS: dict[str, Normalizer] = {
+    **{t: _norm_bool for t in BOOLEAN_TYPES},
+    **{t: _norm_str for t in STRING_TYPES},
+    **{t: _norm_num for t in NUMERIC_TYPES},
+    **{t: _norm_date for t in DATE_TYPES},
+}
 
 
 def normalize(param: Parameter, diagnostics: List[str], expand_in: bool) -> None:
-    typ = param["type"]
-    val = param["original"]
-    if val.lower() == "null":
-        param["normalized"] = "NULL"
+    val = param.original
+    if val in _NULL_LITERALS or (len(val) == 4 and val.lower() == "null"):
+        param.normalized = "NULL"
         return
-    if typ in BOOLEAN_TYPES:
-        v = val.lower()
-        if v == "true":
-            param["normalized"] = "1"
-        elif v == "false":
-            param["normalized"] = "0"
-        else:
-            param["error"] = f"Invalid boolean value '{val}'"
-    elif typ in STRING_TYPES:
-        if expand_in and "," in val:
-            parts = [p.strip() for p in val.split(",")]
-            quoted = ["'" + p.replace("'", "''") + "'" for p in parts]
-            param["normalized"] = "(" + ",".join(quoted) + ")"
-            diagnostics.append(f"Expanded parameter {param['index']} into IN list.")
-        else:
-            param["normalized"] = "'" + val.replace("'", "''") + "'"
-    elif typ in NUMERIC_TYPES:
-        if re.fullmatch(r"-?\d+(\.\d+)?", val.strip()):
-            param["normalized"] = val.strip()
-        else:
-            param["error"] = f"Non-numeric value '{val}' for {typ}"
-    elif typ in DATE_TYPES:
-        param["normalized"] = "'" + val + "'"
-    else:
-        param["normalized"] = val
-        diagnostics.append(f"Unknown JDBC type {typ}; inserted raw value.")
+    fn = _NORMALIZERS.get(param.type, _norm_raw)
+    param.normalized, param.error = fn(param, diagnostics, expand_in)
+
+
+# One run of SQL up to the next placeholder: ordinary characters plus whole
+# '...' literals, "..." identifiers and --/* */ comments, whose contents never
+# hold placeholders.  A match stops at a "?" or at an opener that never closes.
+_SQL_SEGMENT_RE = re.compile(
+    r"""[^?'"/-]*(?:(?:'[^']*'|"[^"]*"|--[^\n]*|/\*.*?\*/|/(?!\*)|-(?!-))[^?'"/-]*)*""",
+    re.S,
+)
+
+_UNTERMINATED = {"'": "string literal", '"': "quoted identifier", "/": "block comment"}
+
+
+def split_placeholders(sql: str, diagnostics: List[str]) -> List[str]:
+    r"""Split ``sql`` on ``?`` placeholders outside literals and comments.
+
+    ``'...'`` literals, ``"..."`` identifiers and ``--``/``/* */`` comments
+    are skipped.  Each segment is matched by one regex call, so Python only
+    loops once per placeholder.  If a literal, identifier or block comment
+    never closes, fall back to splitting on every ``?`` and say so in
+    ``diagnostics``.
+
+    >>> split_placeholders("select '%?%' from t where a=?", [])
+    ["select '%?%' from t where a=", '']
+    >>> len(split_placeholders("select 1 -- user's filter\nwhere a=? and b=?", []))
+    3
+    >>> len(split_placeholders('select "O\'Brien" from t where a=? and b=?', []))
+    3
+    >>> diagnostics = []
+    >>> len(split_placeholders("select 'x from t where a=?", diagnostics))
+    2
+    >>> diagnostics
+    ["Unterminated string literal in SQL; treating every '?' as a placeholder."]
+    """
+
+    if "?" not in sql:
+        # Nothing to bind, so there is no need to tokenize the SQL at all.
+        return [sql]
+    parts: List[str] = []
+    pos = 0
+    match = _SQL_SEGMENT_RE.match
+    while True:
+        end = match(sql, pos).end()
+        parts.append(sql[pos:end])
+        if end == len(sql):
+            return parts
+        if sql[end] != "?":
+            diagnostics.append(
+                f"Unterminated {_UNTERMINATED[sql[end]]} in SQL; "
+                "treating every '?' as a placeholder."
+            )
+            return sql.split("?")
+        pos = end + 1
+
+
+def bind_sql(parts: List[str], params: List[Parameter]) -> str:
+    # ``parts`` comes from ``split_placeholders`` on the raw SQL, so a "?"
+    # inside a bound value is never treated as a placeholder; interleave the
+    # literal segments with the values.
+    values = [p.normalized for p in params]
+    if len(parts) != len(values) + 1:
+        raise ValueError(
+            f"Placeholder count ({len(parts) - 1}) does not match parameter count ({len(values)})."
+        )
+    return "".join(chain.from_iterable(zip(parts, values + [""])))
 
 
-def bind_sql(sql: str, params: List[Parameter]) -> str:
-    bound = sql
-    for p in params:
-        bound = bound.replace("?", p["normalized"], 1)
-    return bound
+def params_to_columns(params: List[Parameter]) -> dict[str, list]:
+    return {
+        "#": [p.index for p in params],
+        "JDBC Type": [p.type for p in params],
+        "Original": ["''" if p.original == "" else p.original for p in params],
+        "Normalized": [p.normalized for p in params],
+        "Notes": [p.error or "" for p in params],
+    }
 
 
-def process(sql: str, logs: str, expand_in: bool):
+@st.cache_data(max_entries=32, show_spinner=False)
+def process(sql: str, logs: str, expand_in: bool) -> dict:
     diagnostics: List[str] = []
     params, warnings = parse_logs(logs)
     diagnostics.extend(warnings)
-    placeholders = sql.count("?")
+    # One scan of the SQL yields both the placeholder count and the segments
+    # that bind_sql interleaves with the values.
+    parts = split_placeholders(sql, diagnostics)
+    placeholders = len(parts) - 1
     for p in params:
         normalize(p, diagnostics, expand_in)
-    errors = [p for p in params if p["error"]]
+    errors = [p for p in params if p.error]
     if errors:
         for p in errors:
-            diagnostics.append(f"Parameter {p['index']} error: {p['error']}")
+            diagnostics.append(f"Parameter {p.index} error: {p.error}")
         final_sql = None
     elif placeholders != len(params):
         diagnostics.append(
@@ -176,9 +317,11 @@ def process(sql: str, logs: str, expand_in: bool):
         )
         final_sql = None
     else:
-        final_sql = bind_sql(sql, params)
+        final_sql = bind_sql(parts, params)
     return {
-        "params": params,
+        # Column-oriented so reruns hand the cached columns straight to the
+        # table instead of rebuilding them from the Parameter objects.
+        "columns": params_to_columns(params),
         "placeholders": placeholders,
         "param_count": len(params),
         "final_sql": final_sql,
@@ -186,6 +329,69 @@ def process(sql: str, logs: str, expand_in: bool):
     }
 
 
+# ---------------------------------------------------------------------------
+# Static CSS / JS
+# ---------------------------------------------------------------------------
+
+# Built once at import instead of on every rerun.  Streamlit removes any
+# element a rerun does not emit again, so these are still sent each run; they
+# are just not rebuilt, and the styles share a single markdown element.
+
+_STATIC_CSS = """
+.top-bar {display:flex;justify-content:space-between;align-items:center;
+          padding:0.5rem 0; border-bottom:1px solid #ddd;}
+.top-title {font-size:1.3rem; font-weight:600;}
+.actions button {margin-left:0.25rem;}
+"""
+
+_THEME_CSS = {
+    "dark": "body{background-color:#0e1117;color:#fafafa;}",
+    "light": "body{background-color:white;color:black;}",
+}
+
+_THEME_JS = """
+<script>
+const theme = window.matchMedia('(prefers-color-scheme: dark)').matches ? 'dark' : 'light';
+const msg = {'theme': theme};
+window.parent.postMessage(msg, '*');
+</script>
+"""
+
+_TABLE_COPY_JS = """
+<script>
+const tables = parent.document.querySelectorAll('div[data-testid="stDataFrame"] table');
+const table = tables[tables.length - 1];
+if (table) {
+    table.querySelectorAll('td').forEach(td => {
+        td.style.cursor = 'pointer';
+        td.title = 'Click to copy';
+        td.addEventListener('click', () => navigator.clipboard.writeText(td.innerText));
+    });
+}
+</script>
+"""
+
+_KEYBOARD_JS = """
+<script>
+document.addEventListener('keydown', function(e) {
+    const mod = e.metaKey || e.ctrlKey;
+    if (mod && e.key === 'Enter') {
+        [...parent.document.querySelectorAll('button')]
+          .find(b => b.innerText === 'Parse & Bind')?.click();
+    }
+    if (mod && e.key.toLowerCase() === 'l') {
+        [...parent.document.querySelectorAll('button')]
+          .find(b => b.innerText === 'Load Example')?.click();
+    }
+    if (e.key === 'Escape') {
+        [...parent.document.querySelectorAll('button')]
+          .find(b => b.innerText === 'Reset')?.click();
+    }
+});
+</script>
+"""
+
+
 # ---------------------------------------------------------------------------
 # UI helpers
 # ---------------------------------------------------------------------------
@@ -194,12 +400,12 @@ def init_state() -> None:
     defaults = {
         "sql": "",
         "logs": "",
-        "auto_parse": True,
         "expand_in": True,
         "theme_mode": "auto",
         "results": None,
         "force_parse": False,
         "sql_font": 14,
+        "last_inputs": None,
     }
     for k, v in defaults.items():
         st.session_state.setdefault(k, v)
@@ -215,6 +421,7 @@ def reset_all() -> None:
     st.session_state.sql = ""
     st.session_state.logs = ""
     st.session_state.results = None
+    st.session_state.last_inputs = None
 
 
 def trigger_parse() -> None:
@@ -234,66 +441,22 @@ def copy_button(label: str, text: str, key: str) -> None:
 
 
 def inject_table_copy_script() -> None:
-    components.html(
-        """
-        <script>
-        const tables = parent.document.querySelectorAll('div[data-testid="stDataFrame"] table');
-        const table = tables[tables.length - 1];
-        if (table) {
-            table.querySelectorAll('td').forEach(td => {
-                td.style.cursor = 'pointer';
-                td.title = 'Click to copy';
-                td.addEventListener('click', () => navigator.clipboard.writeText(td.innerText));
-            });
-        }
-        </script>
-        """,
-        height=0,
-    )
+    components.html(_TABLE_COPY_JS, height=0)
 
 
 def keyboard_shortcuts_script() -> None:
-    components.html(
-        """
-        <script>
-        document.addEventListener('keydown', function(e) {
-            const mod = e.metaKey || e.ctrlKey;
-            if (mod && e.key === 'Enter') {
-                [...parent.document.querySelectorAll('button')]
-                  .find(b => b.innerText === 'Parse & Bind')?.click();
-            }
-            if (mod && e.key.toLowerCase() === 'l') {
-                [...parent.document.querySelectorAll('button')]
-                  .find(b => b.innerText === 'Load Example')?.click();
-            }
-            if (e.key === 'Escape') {
-                [...parent.document.querySelectorAll('button')]
-                  .find(b => b.innerText === 'Reset')?.click();
-            }
-        });
-        </script>
-        """,
-        height=0,
-    )
+    components.html(_KEYBOARD_JS, height=0)
 
 
 def apply_theme() -> None:
-    mode = st.session_state.get("theme_mode", "auto")
-    if mode == "dark":
-        st.markdown("""<style>body{background-color:#0e1117;color:#fafafa;}</style>""", unsafe_allow_html=True)
-    elif mode == "light":
-        st.markdown("""<style>body{background-color:white;color:black;}</style>""", unsafe_allow_html=True)
-    else:
-        components.html(
-            """
-            <script>
-            const theme = window.matchMedia('(prefers-color-scheme: dark)').matches ? 'dark' : 'light';
-            const msg = {'theme': theme};
-            window.parent.postMessage(msg, '*');
-            </script>
-            """,
-            height=0,
-        )
+    # All page-level styles go out as a single markdown element per rerun.
+    mode = str(st.session_state.get("theme_mode", "auto")).lower()
+    st.markdown(
+        f"<style>{_STATIC_CSS}{_THEME_CSS.get(mode, '')}</style>",
+        unsafe_allow_html=True,
+    )
+    if mode not in _THEME_CSS:
+        components.html(_THEME_JS, height=0)
 
 
 # ---------------------------------------------------------------------------
@@ -301,17 +464,6 @@ def apply_theme() -> None:
 # ---------------------------------------------------------------------------
 
 def top_bar(final_sql: str | None) -> None:
-    st.markdown(
-        """
-        <style>
-        .top-bar {display:flex;justify-content:space-between;align-items:center;
-                  padding:0.5rem 0; border-bottom:1px solid #ddd;}
-        .top-title {font-size:1.3rem; font-weight:600;}
-        .actions button {margin-left:0.25rem;}
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
     with st.container():
         col1, col2 = st.columns([3, 2])
         with col1:
@@ -320,17 +472,17 @@ def top_bar(final_sql: str | None) -> None:
                 unsafe_allow_html=True,
             )
         with col2:
-            c1, c2, c3, c4, c5 = st.columns(5)
+            # "Parse & Bind" lives in the input form so it submits the edits.
+            c1, c2, c3, c4 = st.columns(4)
             c1.button("Load Example", on_click=load_example)
-            c2.button("Parse & Bind", on_click=trigger_parse)
-            c3.button("Reset", on_click=reset_all)
-            c4.download_button(
+            c2.button("Reset", on_click=reset_all)
+            c3.download_button(
                 "Download .sql",
                 data=final_sql or "",
                 file_name="bound.sql",
                 disabled=not final_sql,
             )
-            c5.selectbox(
+            c4.selectbox(
                 "Theme",
                 ["Auto", "Light", "Dark"],
                 key="theme_mode",
@@ -339,7 +491,9 @@ def top_bar(final_sql: str | None) -> None:
 
 
 def input_section() -> None:
-    with st.container():
+    # Edits stay in the browser until the form is submitted, so typing into
+    # either text area does not rerun the script.
+    with st.form("bind_form"):
         st.markdown("#### SQL with ? placeholders")
         st.text_area(
             "SQL",
@@ -347,7 +501,6 @@ def input_section() -> None:
             height=300,
             placeholder="Paste SQL with ? placeholders",
         )
-    with st.container():
         st.markdown("#### Hibernate TRACE logs")
         st.text_area(
             "Logs",
@@ -355,7 +508,7 @@ def input_section() -> None:
             height=300,
             placeholder="Paste TRACE logs",
         )
-    st.checkbox("Auto-parse", key="auto_parse")
+        st.form_submit_button("Parse & Bind", on_click=trigger_parse)
     st.checkbox("Expand CSV in IN (?)", key="expand_in")
 
 
@@ -367,27 +520,19 @@ def results_section(results: dict | None) -> None:
     tabs = st.tabs(["Params", "Final SQL", "Diagnostics"])
 
     with tabs[0]:
-        data = [
-            {
-                "#": p["index"],
-                "JDBC Type": p["type"],
-                "Original": "''" if p["original"] == "" else p["original"],
-                "Normalized": p["normalized"],
-                "Notes": p["error"] or "",
-            }
-            for p in results["params"]
-        ]
-        df = pd.DataFrame(data)
-        st.dataframe(df, use_container_width=True)
+        st.dataframe(results["columns"], use_container_width=True, hide_index=True)
         inject_table_copy_script()
 
     with tabs[1]:
         if results["final_sql"]:
             st.slider("Font size", 8, 32, key="sql_font")
+            # Only this small rule changes with the slider; the SQL itself is
+            # rendered (and escaped) by Streamlit's code component.
             st.markdown(
-                f"<pre style='font-family:monospace;font-size:{st.session_state.sql_font}px;'>{results['final_sql']}</pre>",
+                f"<style>div[data-testid='stCode'] code {{font-size:{st.session_state.sql_font}px;}}</style>",
                 unsafe_allow_html=True,
             )
+            st.code(results["final_sql"], language="sql")
             copy_button("Copy", results["final_sql"], "copy-sql")
         else:
             st.warning("Final SQL unavailable due to errors.")
@@ -397,8 +542,7 @@ def results_section(results: dict | None) -> None:
         c1.metric("Placeholders", results["placeholders"])
         c2.metric("Params", results["param_count"])
         if results["diagnostics"]:
-            for msg in results["diagnostics"]:
-                st.write(f"- {msg}")
+            st.markdown("\n".join(f"- {msg}" for msg in results["diagnostics"]))
         else:
             st.success("No diagnostics")
 
@@ -423,13 +567,19 @@ def main() -> None:
     init_state()
     apply_theme()
 
-    if st.session_state.auto_parse or st.session_state.force_parse:
+    # SQL and logs only change when the form is submitted, so re-parse when
+    # they or the options change; unrelated widgets (font slider, theme, tabs)
+    # do not re-parse, and an explicit request always runs.
+    inputs = (
+        st.session_state.sql,
+        st.session_state.logs,
+        st.session_state.expand_in,
+    )
+    changed = inputs != st.session_state.last_inputs
+    if changed or st.session_state.force_parse:
         if st.session_state.sql.strip() and st.session_state.logs.strip():
-            st.session_state.results = process(
-                st.session_state.sql,
-                st.session_state.logs,
-                st.session_state.expand_in,
-            )
+            st.session_state.results = process(*inputs)
+            st.session_state.last_inputs = inputs
             if st.session_state.results["final_sql"]:
                 st.toast("Parse & Bind successful", icon="✅")
             else:
@@ -9,10 +9,12 @@ bootstrap the server when necessary and otherwise render the application
 normally.
 """
 
-from streamlit_app import _bootstrap, _render, get_script_run_ctx
 
+def main() -> None:
+    # Imported here rather than at module top so nothing from Streamlit's
+    # runtime is loaded until we know how we are being launched.
+    from streamlit_app import _bootstrap, _render, get_script_run_ctx
 
-if __name__ == "__main__":
     if get_script_run_ctx() is None:
         # Running as ``python index.py`` – start Streamlit's server manually.
         _bootstrap()
@@ -20,3 +22,7 @@ if __name__ == "__main__":
         # Invoked via ``streamlit run`` – Streamlit is already managing the
         # runtime, so just render the app.
         _render()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,18 +10,23 @@ This module serves two purposes:
 
 from pathlib import Path
 
-try:
-    # Streamlit 1.25+ exposes ``get_script_run_ctx`` which lets us detect
-    # whether ``streamlit run`` is managing the execution context.  Older
-    # versions do not provide this utility, so fall back to a no-op that
-    # mimics the absence of a running context.  Without this guard, attempting
-    # to import from ``streamlit.runtime.scriptrunner`` on such versions raises
-    # an ``ImportError`` which prevents the app from starting and surfaces as a
-    # 404 to end users.
-    from streamlit.runtime.scriptrunner import get_script_run_ctx
-except Exception:  # pragma: no cover - defensive for older Streamlit releases
-    def get_script_run_ctx() -> None:  # type: ignore
+
+def get_script_run_ctx():
+    """Return Streamlit's script run context, or ``None`` outside ``streamlit run``."""
+
+    try:
+        # Streamlit 1.25+ exposes ``get_script_run_ctx`` which lets us detect
+        # whether ``streamlit run`` is managing the execution context.  Older
+        # versions do not provide this utility, so fall back to ``None``, which
+        # mimics the absence of a running context.  Without this guard,
+        # attempting to import from ``streamlit.runtime.scriptrunner`` on such
+        # versions raises an ``ImportError`` which prevents the app from
+        # starting and surfaces as a 404 to end users.  The import is deferred
+        # to the call so merely importing this module stays cheap.
+        from streamlit.runtime.scriptrunner import get_script_run_ctx as _get_ctx
+    except Exception:  # pragma: no cover - defensive for older Streamlit releases
         return None
+    return _get_ctx()
 
 
 def _bootstrap() -> None:
@@ -43,9 +48,11 @@ def _render() -> None:
     render()
 
 
-if __name__ == "__main__" and get_script_run_ctx() is None:
-    _bootstrap()
-else:
-    # When executed with ``streamlit run`` there is already a running context,
-    # so simply render the application.
-    _render()
+if __name__ == "__main__":
+    # ``streamlit run`` also executes this file as ``__main__``, but with a
+    # running context, so simply render the application.  Importing the module
+    # (as ``index.py`` does) must neither render nor bootstrap.
+    if get_script_run_ctx() is None:
+        _bootstrap()
+    else:
+        _render()